@@ -1,38 +1,165 @@
+import base64
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import re
 import os
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+try:
+    import requests_cache
+except ImportError:
+    requests_cache = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Set to True to save HTML for debugging
 DEBUG_MODE = os.environ.get('DEBUG_MODE', 'false').lower() == 'true'
 
-def extract_m3u8_from_channel(channel_url):
-    """Extract m3u8 URL from channel page"""
-    try:
-        # Create a session to maintain cookies
-        session = requests.Session()
+# Number of channel pages fetched concurrently
+MAX_WORKERS = int(os.environ.get('MAX_WORKERS', '16'))
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Referer': 'https://topembed.pw/',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'iframe',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'same-origin'
+}
+
+# Headers a player needs to play the extracted streams, shared by every event
+PLAYBACK_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Referer': 'https://topembed.pw/',
+    'Origin': 'https://topembed.pw'
+}
+
+# The on-disk cache lives next to this script, whatever the working directory
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'm3u8_cache')
+
+_session = None
+
+def is_events_api_response(response):
+    """Only the events API is worth caching (see get_session)"""
+    return urlparse(response.url).path.endswith('/api.php')
+
+def get_session():
+    """One session shared by every request so connections (and cookies) are reused.
+    
+    It is created on first use so importing this module has no side effects.
+    With requests-cache installed, the events API response is also cached on disk
+    so runs within 10 minutes of each other (or whatever Cache-Control allows)
+    skip that call. Nothing else is cached, whatever Cache-Control says: caching
+    reads the whole body, which would defeat the early exit on streamed channel
+    and iframe pages.
+    """
+    global _session
+    if _session is None:
+        if requests_cache:
+            session = requests_cache.CachedSession(
+                CACHE_PATH,
+                backend='sqlite',
+                expire_after=600,
+                filter_fn=is_events_api_response,
+                allowable_methods=('GET',),
+                cache_control=True
+            )
+        else:
+            session = requests.Session()
+        # Only identify the client session-wide; the browser navigation headers are
+        # sent with the channel and iframe page requests that need them
+        session.headers.update({'User-Agent': HEADERS['User-Agent'], 'Referer': HEADERS['Referer']})
+        adapter = HTTPAdapter(pool_connections=50, pool_maxsize=50, max_retries=Retry(total=2, backoff_factor=0.3))
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _session = session
+    return _session
+
+# Any quoted m3u8 URL. This also covers the `source: "..."`, `file: "..."`,
+# `hlsUrl: "..."` etc. forms, so a single pass over the page is enough.
+M3U8_RE = re.compile(r'["\'](https?://[^"\']*\.m3u8[^"\']*)["\']', re.IGNORECASE)
+
+IFRAME_RE = re.compile(r'<iframe[^>]*src=["\'](https?://[^"\']+)["\']', re.IGNORECASE)
+
+# Base64 encoded streams
+BASE64_PATTERNS = (
+    re.compile(r'atob\(["\']([A-Za-z0-9+/=]+)["\']\)'),
+    re.compile(r'decode\(["\']([A-Za-z0-9+/=]+)["\']\)'),
+)
+
+# Pages are scanned while they download; keep the tail of the previous
+# chunk around so URLs split across a chunk boundary still match
+CHUNK_SIZE = 16384
+CHUNK_OVERLAP = 4096
+
+def may_contain_m3u8(text):
+    """Cheap substring check to skip the regex on text that can't match"""
+    return '.m3u8' in text or '.M3U8' in text
+
+def read_until_m3u8(response, stop_on_match=True):
+    """Read a streamed HTML response, returning (m3u8_url, content_read)"""
+    content_type = response.headers.get('Content-Type', '')
+    if content_type and 'html' not in content_type.lower():
+        return None, ''
+    
+    if response.encoding is None:
+        response.encoding = 'utf-8'
+    
+    m3u8_url = None
+    parts = []
+    window = ''
+    for chunk in response.iter_content(chunk_size=CHUNK_SIZE, decode_unicode=True):
+        parts.append(chunk)
+        if m3u8_url:
+            continue
         
-        # First, visit the main page to establish session
-        session.get('https://topembed.pw/', timeout=10)
+        window = window[-CHUNK_OVERLAP:] + chunk
+        if not may_contain_m3u8(window):
+            continue
         
-        # Now visit the channel page with proper referer chain
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Referer': 'https://topembed.pw/',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'iframe',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'same-origin'
-        }
+        match = M3U8_RE.search(window)
+        if match:
+            # Clean up the URL (remove escape characters)
+            m3u8_url = match.group(1).replace('\\/', '/')
+            if stop_on_match:
+                break
+    
+    return m3u8_url, ''.join(parts)
+
+def extract_m3u8_from_iframe(iframe_url, channel_url):
+    """Extract m3u8 URL from an iframe embedded in a channel page"""
+    try:
+        # Set referer to the channel page for the iframe request
+        iframe_headers = {**HEADERS, 'Referer': channel_url}
         
-        response = session.get(channel_url, headers=headers, timeout=15, allow_redirects=True)
-        content = response.text
+        # Streamed and never cached (see get_session), so iframes that aren't HTML
+        # (video, images, ...) are dropped by read_until_m3u8 from their headers
+        # before any body is downloaded
+        with get_session().get(iframe_url, headers=iframe_headers, timeout=10, stream=True) as iframe_response:
+            m3u8_url, _ = read_until_m3u8(iframe_response)
+        return m3u8_url
+    except Exception as e:
+        print(f"    Error checking iframe {iframe_url}: {e}")
+        return None
+
+def extract_m3u8_from_channel(channel_url):
+    """Extract m3u8 URL from channel page"""
+    try:
+        # Stop downloading as soon as an m3u8 URL shows up, unless the full page is needed for debugging
+        with get_session().get(channel_url, headers=HEADERS, timeout=15, allow_redirects=True, stream=True) as response:
+            m3u8_url, content = read_until_m3u8(response, stop_on_match=not DEBUG_MODE)
         
         # Debug: Save HTML content if DEBUG_MODE is enabled
         if DEBUG_MODE:
@@ -44,62 +171,31 @@ def extract_m3u8_from_channel(channel_url):
                 f.write(content)
             print(f"    [DEBUG] Saved HTML to {debug_file}")
         
-        # Multiple patterns to find m3u8 URLs
-        m3u8_patterns = [
-            r'["\'](https?://[^"\']*\.m3u8[^"\']*)["\']',
-            r'source\s*:\s*["\'](https?://[^"\']*\.m3u8[^"\']*)["\']',
-            r'file\s*:\s*["\'](https?://[^"\']*\.m3u8[^"\']*)["\']',
-            r'src\s*:\s*["\'](https?://[^"\']*\.m3u8[^"\']*)["\']',
-            r'hlsUrl\s*:\s*["\'](https?://[^"\']*\.m3u8[^"\']*)["\']',
-            r'stream\s*:\s*["\'](https?://[^"\']*\.m3u8[^"\']*)["\']',
-            r'playlist\s*:\s*["\'](https?://[^"\']*\.m3u8[^"\']*)["\']',
-        ]
-        
-        for pattern in m3u8_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            if matches:
-                # Clean up the URL (remove escape characters)
-                m3u8_url = matches[0].replace('\\/', '/')
-                return m3u8_url
+        if m3u8_url:
+            return m3u8_url
         
         # Also check for iframe that might contain the m3u8
-        iframe_pattern = r'<iframe[^>]*src=["\'](https?://[^"\']+)["\']'
-        iframe_matches = re.findall(iframe_pattern, content, re.IGNORECASE)
-        if iframe_matches:
-            # Try to extract m3u8 from the first few iframes
-            for iframe_url in iframe_matches[:3]:  # Check first 3 iframes
-                if 'topembed.pw' in iframe_url or 'embed' in iframe_url.lower():
-                    try:
-                        # Set referer to the channel page for the iframe request
-                        iframe_headers = headers.copy()
-                        iframe_headers['Referer'] = channel_url
-                        
-                        iframe_response = session.get(iframe_url, headers=iframe_headers, timeout=10)
-                        for pattern in m3u8_patterns:
-                            matches = re.findall(pattern, iframe_response.text, re.IGNORECASE)
-                            if matches:
-                                m3u8_url = matches[0].replace('\\/', '/')
-                                return m3u8_url
-                    except Exception as e:
-                        print(f"    Error checking iframe {iframe_url}: {e}")
-                        continue
-        
-        # Check for Base64 encoded streams
-        base64_patterns = [
-            r'atob\(["\']([A-Za-z0-9+/=]+)["\']\)',
-            r'decode\(["\']([A-Za-z0-9+/=]+)["\']\)',
+        iframe_matches = IFRAME_RE.findall(content)
+        iframe_urls = [
+            iframe_url for iframe_url in iframe_matches[:3]  # Check first 3 iframes
+            if 'topembed.pw' in iframe_url or 'embed' in iframe_url.lower()
         ]
+        if iframe_urls:
+            # Fetch the iframes together, but still prefer the first one that has a stream
+            with ThreadPoolExecutor(max_workers=len(iframe_urls)) as executor:
+                for m3u8_url in executor.map(extract_m3u8_from_iframe, iframe_urls, [channel_url] * len(iframe_urls)):
+                    if m3u8_url:
+                        return m3u8_url
         
-        for pattern in base64_patterns:
-            matches = re.findall(pattern, content)
+        # Check for Base64 encoded streams
+        for pattern in BASE64_PATTERNS:
+            matches = pattern.findall(content)
             if matches:
                 try:
-                    import base64
                     decoded = base64.b64decode(matches[0]).decode('utf-8', errors='ignore')
-                    for m3u8_pattern in m3u8_patterns:
-                        m3u8_matches = re.findall(m3u8_pattern, decoded, re.IGNORECASE)
-                        if m3u8_matches:
-                            return m3u8_matches[0].replace('\\/', '/')
+                    match = may_contain_m3u8(decoded) and M3U8_RE.search(decoded)
+                    if match:
+                        return match.group(1).replace('\\/', '/')
                 except:
                     continue
         
@@ -108,14 +204,24 @@ def extract_m3u8_from_channel(channel_url):
         print(f"  Error extracting m3u8 from {channel_url}: {e}")
         return None
 
+def establish_session():
+    """Visit the main page once so the shared session picks up its cookies"""
+    try:
+        get_session().get('https://topembed.pw/', timeout=10)
+    except Exception as e:
+        print(f"Warning: could not establish session with topembed.pw: {e}")
+
 def fetch_events():
     """Fetch events from the API"""
     api_url = "https://topembed.pw/api.php?format=json"
     
     try:
-        response = requests.get(api_url, timeout=15)
+        response = get_session().get(api_url, timeout=15)
         response.raise_for_status()
-        data = response.json()
+        if orjson:
+            data = orjson.loads(response.content)
+        else:
+            data = response.json()
         return data
     except Exception as e:
         print(f"Error fetching events: {e}")
@@ -131,75 +237,100 @@ def process_events(events_data):
     
     events_by_date = events_data['events']
     
+    # All events from this run share one timestamp
+    run_timestamp = datetime.now(timezone.utc).isoformat()
+    
+    # Collect every event that has channels so all channel pages can be fetched at once
+    pending_events = []
     for date, events_list in events_by_date.items():
-        print(f"\n=== Processing events for {date} ===")
-        
         for event in events_list:
             if not isinstance(event, dict):
                 continue
             
-            # Get event details
-            sport = event.get('sport', 'Unknown')
-            tournament = event.get('tournament', 'Unknown')
-            match = event.get('match', 'Unknown')
-            timestamp = event.get('unix_timestamp', 0)
             channels = event.get('channels', [])
-            
             if not channels:
                 continue
             
-            print(f"\nProcessing: {sport} - {match}")
-            print(f"  Channels found: {len(channels)}")
-            
-            # Process each channel URL
-            channel_streams = []
-            for idx, channel_url in enumerate(channels):
-                print(f"  Extracting from channel {idx + 1}/{len(channels)}: {channel_url}")
-                m3u8_url = extract_m3u8_from_channel(channel_url)
-                
-                if m3u8_url:
-                    print(f"    ✓ Found m3u8: {m3u8_url[:80]}...")
-                    channel_streams.append({
-                        'channel_url': channel_url,
-                        'm3u8_url': m3u8_url
-                    })
-                else:
-                    print(f"    ✗ No m3u8 found")
-                    channel_streams.append({
-                        'channel_url': channel_url,
-                        'm3u8_url': None
-                    })
-            
-            # Create event info
-            event_info = {
-                'date': date,
-                'unix_timestamp': timestamp,
-                'sport': sport,
-                'tournament': tournament,
-                'match': match,
-                'streams': channel_streams,
-                'playback_headers': {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    'Referer': 'https://topembed.pw/',
-                    'Origin': 'https://topembed.pw'
-                },
-                'last_updated': datetime.utcnow().isoformat()
-            }
+            pending_events.append((date, event, channels))
+    
+    # The same channel is often listed for several events, so only fetch each URL once
+    channel_urls = list(dict.fromkeys(
+        channel_url for _, _, channels in pending_events for channel_url in channels
+    ))
+    print(f"Extracting from {len(channel_urls)} unique channel(s) using {MAX_WORKERS} workers...")
+    
+    # Visit the main page first so channel pages are requested with a proper referer chain
+    establish_session()
+    
+    # Channel extraction is network-bound, so overlap the requests in a thread pool
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        resolved = dict(zip(channel_urls, executor.map(extract_m3u8_from_channel, channel_urls)))
+    
+    current_date = None
+    for date, event, channels in pending_events:
+        if date != current_date:
+            current_date = date
+            print(f"\n=== Processing events for {date} ===")
+        
+        # Get event details
+        sport = event.get('sport', 'Unknown')
+        tournament = event.get('tournament', 'Unknown')
+        match = event.get('match', 'Unknown')
+        timestamp = event.get('unix_timestamp', 0)
+        
+        channel_count = len(channels)
+        print(f"\nProcessing: {sport} - {match}")
+        print(f"  Channels found: {channel_count}")
+        
+        # Stitch the extracted m3u8 URLs back onto this event's channels
+        channel_streams = []
+        for idx, channel_url in enumerate(channels):
+            print(f"  Channel {idx + 1}/{channel_count}: {channel_url}")
+            m3u8_url = resolved[channel_url]
             
-            processed_events.append(event_info)
+            if m3u8_url:
+                print(f"    ✓ Found m3u8: {m3u8_url[:80]}...")
+                channel_streams.append({
+                    'channel_url': channel_url,
+                    'm3u8_url': m3u8_url
+                })
+            else:
+                print(f"    ✗ No m3u8 found")
+                channel_streams.append({
+                    'channel_url': channel_url,
+                    'm3u8_url': None
+                })
+        
+        # Create event info
+        event_info = {
+            'date': date,
+            'unix_timestamp': timestamp,
+            'sport': sport,
+            'tournament': tournament,
+            'match': match,
+            'streams': channel_streams,
+            'playback_headers': PLAYBACK_HEADERS,
+            'last_updated': run_timestamp
+        }
+        
+        processed_events.append(event_info)
     
     return processed_events
 
 def save_to_json(data, filename='events_m3u8.json'):
     """Save processed events to JSON file"""
     output = {
-        'updated_at': datetime.utcnow().isoformat(),
+        'updated_at': datetime.now(timezone.utc).isoformat(),
         'total_events': len(data),
         'events': data
     }
     
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    if orjson:
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(output, option=orjson.OPT_INDENT_2))
+    else:
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(output, f, indent=2, ensure_ascii=False)
     
     print(f"\n✓ Saved {len(data)} events to {filename}")
 
@@ -229,10 +360,10 @@ def main():
     m3u8_found = 0
     total_channels = 0
     for event in processed_events:
-        for stream in event.get('streams', []):
-            total_channels += 1
-            if stream.get('m3u8_url'):
-                m3u8_found += 1
+        # Streams are built by process_events, so both keys are always present
+        streams = event['streams']
+        total_channels += len(streams)
+        m3u8_found += sum(1 for stream in streams if stream['m3u8_url'])
     
     print("\n" + "=" * 60)
     print("Summary:")
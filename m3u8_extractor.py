@@ -5,37 +5,154 @@ Extracts M3U8 URLs and event information from playlist
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import re
 import json
 import datetime
+import logging
 import os
-from typing import Dict, List, Optional
-from urllib.parse import urljoin, urlparse
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, Optional, Union
+from urllib.parse import urljoin
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of sub-playlists fetched at the same time
+MAX_WORKERS = 16
+
+# Playlist-level tags stored in result['metadata']: tag -> (key, type)
+METADATA_TAGS = {
+    '#EXT-X-VERSION': ('version', str),
+    '#EXT-X-TARGETDURATION': ('target_duration', int),
+    '#EXT-X-MEDIA-SEQUENCE': ('media_sequence', int),
+}
+
+# One attribute of a tag's attribute list: NAME=value or NAME="quoted value"
+ATTRIBUTE_RE = re.compile(r'([A-Z0-9-]+)=(?:"([^"]*)"|([^,]*))')
+
+# Attributes kept from EXT-X-STREAM-INF and EXT-X-DATERANGE: name -> (key, type)
+STREAM_INF_ATTRIBUTES = {
+    'BANDWIDTH': ('bandwidth', int),
+    'RESOLUTION': ('resolution', str),
+    'CODECS': ('codecs', str),
+}
+DATERANGE_ATTRIBUTES = {
+    'ID': ('id', str),
+    'START-DATE': ('start_date', str),
+    'END-DATE': ('end_date', str),
+    'DURATION': ('duration', float),
+}
+
+# EXTINF attributes, matched in a single scan (group name = result key)
+EXTINF_RE = re.compile(
+    r'#EXTINF:(?P<duration>[\d.-]+)'
+    r'|tvg-logo="(?P<logo>[^"]+)"'
+    r'|group-title="(?P<group_title>[^"]+)"'
+)
+
+# Event titles like "01:00AM | Event Name (09/23/25) [VDO]"
+EVENT_ENTRY_RE = re.compile(r'\d{1,2}:\d{2}(AM|PM)\s*\|', re.IGNORECASE)
+EVENT_TIME_RE = re.compile(r'(\d{1,2}:\d{2}(?:AM|PM))', re.IGNORECASE)
+EVENT_DATE_RE = re.compile(r'\((\d{1,2}/\d{1,2}/\d{2,4})\)')
+CHANNEL_TAG_RE = re.compile(r'\[([^\]]+)\]$')
+TRAILING_CHANNEL_TAG_RE = re.compile(r'\s*\[[^\]]+\]$')
+# Time and trailing channel tag, stripped in one pass from titles without a pipe
+CLEAN_TITLE_RE = re.compile(r'\d{1,2}:\d{2}(?:AM|PM)\s*\|?|\s*\[[^\]]+\]$', re.IGNORECASE)
+
+@lru_cache(maxsize=64)
+def base_directory(base_url: str) -> str:
+    """Directory of a playlist URL (without query), relative entries resolve against it"""
+    return urljoin(base_url, '.')
+
+def resolve_url(base_url: str, url: str) -> str:
+    """Resolve a playlist entry against the playlist URL"""
+    if url.startswith('http'):
+        return url
+    # Only plain relative paths take the shortcut; absolute paths, dot segments,
+    # schemes, params, fragments and empty queries get urljoin's normalisation
+    if (not url or url[0] in '/.?' or url[-1] == '?'
+            or ':' in url or ';' in url or '#' in url or '/.' in url or '//' in url):
+        return urljoin(base_url, url)
+    return base_directory(base_url) + url
+
+def split_lines(chunks: Iterable[str]) -> Iterator[str]:
+    r"""Split streamed text chunks into lines (line endings kept).
+    
+    The last line of each chunk is carried over, so a line, or a \r\n pair,
+    split across a chunk boundary comes out whole:
+    
+    >>> list(split_lines(['#EXTINF:-1,A\r', '\nhttp://h/a.ts\r\n']))
+    ['#EXTINF:-1,A\r\n', 'http://h/a.ts\r\n']
+    """
+    pending = ''
+    for chunk in chunks:
+        lines = (pending + chunk).splitlines(True)
+        pending = lines.pop() if lines else ''
+        yield from lines
+    if pending:
+        yield pending
 
 class M3U8Extractor:
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, now: Optional[datetime.datetime] = None):
         self.base_url = base_url
+        # Every playlist parsed by this extractor (master and variants) shares one timestamp
+        self.timestamp = (now or datetime.datetime.now()).isoformat()
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        # Big enough pool for the concurrent sub-playlist fetches to reuse their connections
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[429, 500, 502, 503, 504])
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
     
-    def fetch_playlist(self, url: str) -> Optional[str]:
-        """Fetch M3U8 playlist content"""
+    def fetch_playlist(self, url: str) -> Optional[requests.Response]:
+        """Fetch M3U8 playlist, leaving the body to be streamed"""
         try:
-            response = self.session.get(url, timeout=30)
+            response = self.session.get(url, timeout=30, stream=True)
             response.raise_for_status()
-            return response.text
+            # Playlists are UTF-8, don't guess the charset when the server omits it
+            if response.encoding is None:
+                response.encoding = 'utf-8'
+            return response
+        except requests.RequestException as e:
+            logger.error('Error fetching playlist: %s', e)
+            return None
+    
+    def fetch_and_parse(self, url: str) -> Optional[Dict]:
+        """Fetch a playlist and parse it while the body is still downloading"""
+        response = self.fetch_playlist(url)
+        if response is None:
+            return None
+        
+        try:
+            with response:
+                return self.parse_m3u8(split_lines(response.iter_content(chunk_size=65536, decode_unicode=True)), url)
         except requests.RequestException as e:
-            print(f"Error fetching playlist: {e}")
+            logger.error('Error fetching playlist: %s', e)
             return None
     
-    def parse_m3u8(self, content: str, base_url: str) -> Dict:
-        """Parse M3U8 content and extract URLs and metadata"""
-        lines = content.strip().split('\n')
+    # Parsing is pure string/regex work. Numba can only run that in object mode,
+    # so @numba.jit here (or on the parse_* helpers) would add JIT overhead without
+    # any speedup; cut per-line work in Python or move it to a C/Cython extension.
+    def parse_m3u8(self, lines: Union[str, Iterable[str]], base_url: str) -> Dict:
+        """Parse M3U8 content (a string or an iterable of lines) and extract URLs and metadata"""
+        if isinstance(lines, str):
+            lines = lines.splitlines()
         
         result = {
-            'timestamp': datetime.datetime.now().isoformat(),
+            'timestamp': self.timestamp,
             'base_url': base_url,
             'streams': [],
             'segments': [],
@@ -44,154 +161,166 @@ class M3U8Extractor:
             'metadata': {}
         }
         
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            
-            if line.startswith('#EXT-X-VERSION'):
-                result['metadata']['version'] = line.split(':')[1]
-            
-            elif line.startswith('#EXT-X-TARGETDURATION'):
-                result['metadata']['target_duration'] = int(line.split(':')[1])
-            
-            elif line.startswith('#EXT-X-MEDIA-SEQUENCE'):
-                result['metadata']['media_sequence'] = int(line.split(':')[1])
-            
-            elif line.startswith('#EXT-X-STREAM-INF'):
-                # Master playlist with multiple streams
-                stream_info = self.parse_stream_inf(line)
-                if i + 1 < len(lines):
-                    stream_url = lines[i + 1].strip()
-                    if not stream_url.startswith('http'):
-                        stream_url = urljoin(base_url, stream_url)
-                    stream_info['url'] = stream_url
-                    result['streams'].append(stream_info)
-                i += 1
-            
-            elif line.startswith('#EXTINF'):
-                # Media segment or event entry
-                extinf_info = self.parse_extinf(line)
-                if i + 1 < len(lines):
-                    next_line = lines[i + 1].strip()
-                    
-                    # Check if this is an event/channel entry (has title with time and description)
-                    if extinf_info.get('title') and self.is_event_entry(extinf_info['title']):
-                        event_info = self.parse_event_title(extinf_info['title'])
-                        if not next_line.startswith('http'):
-                            next_line = urljoin(base_url, next_line)
-                        
-                        event_info.update({
-                            'url': next_line,
-                            'duration': extinf_info.get('duration'),
-                            'logo': extinf_info.get('logo'),
-                            'group_title': extinf_info.get('group_title')
-                        })
-                        
-                        # Group events by title
-                        event_title = event_info.get('event_title', 'Unknown Event')
-                        if event_title not in result['grouped_events']:
-                            result['grouped_events'][event_title] = {
-                                'event_title': event_title,
-                                'event_time': event_info.get('event_time'),
-                                'event_date': event_info.get('event_date'),
-                                'category': event_info.get('category'),
-                                'channels': []
-                            }
-                        
-                        result['grouped_events'][event_title]['channels'].append({
-                            'channel_name': event_info.get('channel_name'),
-                            'url': event_info.get('url'),
-                            'logo': event_info.get('logo'),
-                            'duration': event_info.get('duration')
-                        })
-                        
-                        result['events'].append(event_info)
-                    else:
-                        # Regular media segment
-                        if not next_line.startswith('http'):
-                            next_line = urljoin(base_url, next_line)
-                        extinf_info['url'] = next_line
-                        result['segments'].append(extinf_info)
-                i += 1
-            
-            elif line.startswith('#EXT-X-PROGRAM-DATE-TIME'):
-                # Program date time (event timing)
-                pdt = line.split(':', 1)[1]
-                result['events'].append({
-                    'type': 'program_date_time',
-                    'timestamp': pdt,
-                    'line_number': i
-                })
-            
-            elif line.startswith('#EXT-X-DATERANGE'):
-                # Date range (event information)
-                event_info = self.parse_daterange(line)
-                result['events'].append(event_info)
+        # Tag (text before the first colon) -> handler
+        handlers = {
+            '#EXT-X-STREAM-INF': self.handle_stream_inf,
+            '#EXTINF': self.handle_extinf,
+            '#EXT-X-PROGRAM-DATE-TIME': self.handle_program_date_time,
+            '#EXT-X-DATERANGE': self.handle_daterange,
+            '#EXT-X-CUE-OUT': self.handle_cue_out,
+            '#EXT-X-CUE-IN': self.handle_cue_in,
+        }
+        
+        # URL lines are read ahead by the STREAM-INF and EXTINF handlers via next()
+        numbered_lines = enumerate(lines)
+        for i, line in numbered_lines:
+            line = line.strip()
+            # URL lines belonging to a tag are consumed by its handler; skip blank or stray ones
+            if not line.startswith('#'):
+                continue
             
-            elif line.startswith('#EXT-X-CUE-OUT'):
-                # Ad break start
-                result['events'].append({
-                    'type': 'cue_out',
-                    'duration': line.split(':', 1)[1] if ':' in line else None,
-                    'line_number': i
-                })
+            tag, _, value = line.partition(':')
             
-            elif line.startswith('#EXT-X-CUE-IN'):
-                # Ad break end
-                result['events'].append({
-                    'type': 'cue_in',
-                    'line_number': i
-                })
+            if tag in METADATA_TAGS:
+                key, cast = METADATA_TAGS[tag]
+                result['metadata'][key] = cast(value)
+                continue
             
-            i += 1
+            handler = handlers.get(tag)
+            if handler:
+                handler(line, value, i, numbered_lines, result)
         
         return result
     
+    def handle_stream_inf(self, line: str, value: str, i: int, numbered_lines: Iterator, result: Dict):
+        """Master playlist with multiple streams"""
+        stream_info = self.parse_stream_inf(line)
+        next_entry = next(numbered_lines, None)
+        if next_entry is not None:
+            stream_info['url'] = resolve_url(result['base_url'], next_entry[1].strip())
+            result['streams'].append(stream_info)
+    
+    def handle_extinf(self, line: str, value: str, i: int, numbered_lines: Iterator, result: Dict):
+        """Media segment or event entry"""
+        extinf_info = self.parse_extinf(line)
+        next_entry = next(numbered_lines, None)
+        if next_entry is None:
+            return
+        
+        next_line = resolve_url(result['base_url'], next_entry[1].strip())
+        
+        # Check if this is an event/channel entry (has title with time and description)
+        if not (extinf_info.get('title') and self.is_event_entry(extinf_info['title'])):
+            # Regular media segment
+            extinf_info['url'] = next_line
+            result['segments'].append(extinf_info)
+            return
+        
+        event_info = self.parse_event_title(extinf_info['title'])
+        event_info.update({
+            'url': next_line,
+            'duration': extinf_info.get('duration'),
+            'logo': extinf_info.get('logo'),
+            'group_title': extinf_info.get('group_title')
+        })
+        
+        # Group events by title
+        grouped_events = result['grouped_events']
+        event_title = event_info.get('event_title', 'Unknown Event')
+        group = grouped_events.get(event_title)
+        if group is None:
+            group = grouped_events[event_title] = {
+                'event_title': event_title,
+                'event_time': event_info.get('event_time'),
+                'event_date': event_info.get('event_date'),
+                'category': event_info.get('category'),
+                'channels': []
+            }
+        
+        group['channels'].append({
+            'channel_name': event_info.get('channel_name'),
+            'url': event_info.get('url'),
+            'logo': event_info.get('logo'),
+            'duration': event_info.get('duration')
+        })
+        
+        result['events'].append(event_info)
+    
+    def handle_program_date_time(self, line: str, value: str, i: int, numbered_lines: Iterator, result: Dict):
+        """Program date time (event timing)"""
+        result['events'].append({
+            'type': 'program_date_time',
+            'timestamp': value,
+            'line_number': i
+        })
+    
+    def handle_daterange(self, line: str, value: str, i: int, numbered_lines: Iterator, result: Dict):
+        """Date range (event information)"""
+        result['events'].append(self.parse_daterange(line))
+    
+    def handle_cue_out(self, line: str, value: str, i: int, numbered_lines: Iterator, result: Dict):
+        """Ad break start"""
+        result['events'].append({
+            'type': 'cue_out',
+            'duration': value if ':' in line else None,
+            'line_number': i
+        })
+    
+    def handle_cue_in(self, line: str, value: str, i: int, numbered_lines: Iterator, result: Dict):
+        """Ad break end"""
+        result['events'].append({
+            'type': 'cue_in',
+            'line_number': i
+        })
+    
     def parse_stream_inf(self, line: str) -> Dict:
         """Parse EXT-X-STREAM-INF line"""
         info = {'type': 'stream'}
         
-        # Extract bandwidth
-        bandwidth_match = re.search(r'BANDWIDTH=(\d+)', line)
-        if bandwidth_match:
-            info['bandwidth'] = int(bandwidth_match.group(1))
-        
-        # Extract resolution
-        resolution_match = re.search(r'RESOLUTION=(\d+x\d+)', line)
-        if resolution_match:
-            info['resolution'] = resolution_match.group(1)
-        
-        # Extract codecs
-        codecs_match = re.search(r'CODECS="([^"]+)"', line)
-        if codecs_match:
-            info['codecs'] = codecs_match.group(1)
+        # Extract bandwidth, resolution and codecs
+        info.update(self.parse_attributes(line, STREAM_INF_ATTRIBUTES))
         
         return info
     
+    def parse_attributes(self, line: str, fields: Dict) -> Dict:
+        """Parse a tag's attribute list in one pass, keeping only the given fields"""
+        attributes = {}
+        for match in ATTRIBUTE_RE.finditer(line, line.find(':') + 1):
+            name, quoted_value, value = match.groups()
+            if quoted_value is not None:
+                value = quoted_value
+            if name not in fields or not value:
+                continue
+            
+            key, cast = fields[name]
+            if key not in attributes:
+                try:
+                    attributes[key] = cast(value)
+                except ValueError:
+                    continue
+        
+        return attributes
+    
     def parse_extinf(self, line: str) -> Dict:
         """Parse EXTINF line"""
         info = {'type': 'segment'}
         
-        # Extract duration
-        duration_match = re.search(r'#EXTINF:([\d.-]+)', line)
-        if duration_match:
-            duration_val = duration_match.group(1)
-            if duration_val != '-1':
-                info['duration'] = float(duration_val)
-        
-        # Extract tvg-logo
-        logo_match = re.search(r'tvg-logo="([^"]+)"', line)
-        if logo_match:
-            info['logo'] = logo_match.group(1)
-        
-        # Extract group-title
-        group_match = re.search(r'group-title="([^"]+)"', line)
-        if group_match:
-            info['group_title'] = group_match.group(1)
-        
-        # Extract title (everything after the comma)
-        if ',' in line:
-            title = line.split(',', 1)[1].strip()
+        # Extract duration, tvg-logo and group-title
+        attrs_end = 0
+        for match in EXTINF_RE.finditer(line):
+            key = match.lastgroup
+            value = match.group(key)
+            if key == 'duration':
+                if value != '-1':
+                    info['duration'] = float(value)
+            else:
+                info.setdefault(key, value)
+            attrs_end = match.end()
+        
+        # Extract title (everything after the comma that follows the attributes)
+        comma = line.find(',', attrs_end)
+        if comma != -1:
+            title = line[comma + 1:].strip()
             if title:
                 info['title'] = title
         
@@ -200,20 +329,22 @@ class M3U8Extractor:
     def is_event_entry(self, title: str) -> bool:
         """Check if this is an event entry based on title format"""
         # Look for time patterns like "01:00AM|", "12:30PM|", etc.
-        time_pattern = r'\d{1,2}:\d{2}(AM|PM)\s*\|'
-        return bool(re.search(time_pattern, title, re.IGNORECASE))
+        # Titles without a pipe can't match, so skip the regex for them
+        if '|' not in title:
+            return False
+        return bool(EVENT_ENTRY_RE.search(title))
     
     def parse_event_title(self, title: str) -> Dict:
         """Parse event title to extract time, event name, and channel info"""
         event_info = {}
         
         # Extract time (e.g., "01:00AM")
-        time_match = re.search(r'(\d{1,2}:\d{2}(?:AM|PM))', title, re.IGNORECASE)
+        time_match = EVENT_TIME_RE.search(title)
         if time_match:
             event_info['event_time'] = time_match.group(1)
         
         # Extract date if present (e.g., "(09/23/25)")
-        date_match = re.search(r'\((\d{1,2}/\d{1,2}/\d{2,4})\)', title)
+        date_match = EVENT_DATE_RE.search(title)
         if date_match:
             event_info['event_date'] = date_match.group(1)
         
@@ -224,11 +355,11 @@ class M3U8Extractor:
                 event_description = parts[1].strip()
                 
                 # Check for channel indicator at the end [VDO], [HDD A], etc.
-                channel_match = re.search(r'\[([^\]]+)\]$', event_description)
+                channel_match = CHANNEL_TAG_RE.search(event_description)
                 if channel_match:
                     event_info['channel_name'] = channel_match.group(1).strip()
                     # Remove channel indicator from event description
-                    event_description = re.sub(r'\s*\[[^\]]+\]$', '', event_description).strip()
+                    event_description = TRAILING_CHANNEL_TAG_RE.sub('', event_description).strip()
                 
                 # The remaining is the event title
                 event_info['event_title'] = event_description
@@ -236,9 +367,7 @@ class M3U8Extractor:
         # If no pipe, use the whole title
         if 'event_title' not in event_info:
             # Remove time and channel parts
-            clean_title = title
-            clean_title = re.sub(r'\d{1,2}:\d{2}(?:AM|PM)\s*\|?', '', clean_title, flags=re.IGNORECASE)
-            clean_title = re.sub(r'\s*\[[^\]]+\]$', '', clean_title)
+            clean_title = CLEAN_TITLE_RE.sub('', title)
             event_info['event_title'] = clean_title.strip()
         
         return event_info
@@ -247,137 +376,172 @@ class M3U8Extractor:
         """Parse EXT-X-DATERANGE line"""
         event = {'type': 'daterange'}
         
-        # Extract ID
-        id_match = re.search(r'ID="([^"]+)"', line)
-        if id_match:
-            event['id'] = id_match.group(1)
-        
-        # Extract start date
-        start_match = re.search(r'START-DATE="([^"]+)"', line)
-        if start_match:
-            event['start_date'] = start_match.group(1)
-        
-        # Extract end date
-        end_match = re.search(r'END-DATE="([^"]+)"', line)
-        if end_match:
-            event['end_date'] = end_match.group(1)
-        
-        # Extract duration
-        duration_match = re.search(r'DURATION=([\d.]+)', line)
-        if duration_match:
-            event['duration'] = float(duration_match.group(1))
+        # Extract ID, start/end date and duration
+        event.update(self.parse_attributes(line, DATERANGE_ATTRIBUTES))
         
         return event
     
     def extract_all(self, url: str) -> Dict:
         """Main extraction method"""
-        print(f"Fetching playlist from: {url}")
+        logger.info('Fetching playlist from: %s', url)
         
-        content = self.fetch_playlist(url)
-        if not content:
+        result = self.fetch_and_parse(url)
+        if result is None:
             return {'error': 'Failed to fetch playlist'}
         
-        result = self.parse_m3u8(content, url)
-        
         # If this is a master playlist, also fetch individual streams
         if result['streams']:
-            print(f"Found {len(result['streams'])} streams")
-            for stream in result['streams']:
-                stream_content = self.fetch_playlist(stream['url'])
-                if stream_content:
-                    stream_data = self.parse_m3u8(stream_content, stream['url'])
+            streams = result['streams']
+            logger.info('Found %d streams', len(streams))
+            # Sub-playlists are independent requests, fetch them concurrently
+            with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(streams))) as executor:
+                stream_results = list(executor.map(self.fetch_and_parse, [stream['url'] for stream in streams]))
+            
+            for stream, stream_data in zip(streams, stream_results):
+                if stream_data:
                     stream['segments'] = stream_data['segments']
                     stream['events'] = stream_data['events']
                     stream['metadata'] = stream_data['metadata']
         
         return result
 
+def encode_json(data, depth: int = 0) -> bytes:
+    """Encode data as indented JSON, using orjson when it is installed"""
+    if orjson:
+        encoded = orjson.dumps(data, default=str, option=orjson.OPT_INDENT_2)
+    else:
+        encoded = json.dumps(data, indent=2, default=str).encode('utf-8')
+    
+    # Re-indent so the value can be nested `depth` levels deep
+    if depth:
+        encoded = encoded.replace(b'\n', b'\n' + b'  ' * depth)
+    return encoded
+
+def write_json(data, path: str):
+    """Write data as indented JSON, one top-level entry (and list item) at a time"""
+    with open(path, 'wb') as f:
+        if not isinstance(data, dict) or not data:
+            f.write(encode_json(data))
+            return
+        
+        # Same layout as a single indent=2 dump, but the big streams/segments/events
+        # lists are never held in memory as one encoded string
+        f.write(b'{')
+        for index, (key, value) in enumerate(data.items()):
+            f.write(b',\n  ' if index else b'\n  ')
+            f.write(encode_json(str(key)) + b': ')
+            if isinstance(value, list) and value:
+                f.write(b'[')
+                for item_index, item in enumerate(value):
+                    f.write(b',\n    ' if item_index else b'\n    ')
+                    f.write(encode_json(item, depth=2))
+                f.write(b'\n  ]')
+            else:
+                f.write(encode_json(value, depth=1))
+        f.write(b'\n}')
+
 def save_results(data: Dict, output_dir: str = 'output'):
     """Save extraction results to files"""
     os.makedirs(output_dir, exist_ok=True)
     
     # Save full data as JSON with fixed filename
     json_file = os.path.join(output_dir, 'rbtv.json')
-    with open(json_file, 'w') as f:
-        json.dump(data, f, indent=2, default=str)
+    write_json(data, json_file)
     
     # Save grouped events as separate JSON with fixed filename
     if data.get('grouped_events'):
         grouped_file = os.path.join(output_dir, 'rbtv_grouped_events.json')
-        with open(grouped_file, 'w') as f:
-            json.dump(data['grouped_events'], f, indent=2, default=str)
+        write_json(data['grouped_events'], grouped_file)
     
     # Save URLs with grouping with fixed filename
     urls_file = os.path.join(output_dir, 'rbtv_urls.txt')
+    parts = [
+        f"Extracted at: {data.get('timestamp', 'Unknown')}\n",
+        f"Base URL: {data.get('base_url', 'Unknown')}\n\n"
+    ]
+    
+    # Write grouped events
+    if data.get('grouped_events'):
+        parts.append("=== GROUPED EVENTS BY TITLE ===\n\n")
+        for event_title, event_data in data['grouped_events'].items():
+            channels = event_data.get('channels', [])
+            parts.append(f"EVENT: {event_title}\n")
+            parts.append(f"Time: {event_data.get('event_time', 'N/A')}\n")
+            parts.append(f"Date: {event_data.get('event_date', 'N/A')}\n")
+            parts.append(f"Category: {event_data.get('category', 'N/A')}\n")
+            parts.append(f"Available Channels ({len(channels)}):\n")
+            
+            for i, channel in enumerate(channels, 1):
+                channel_name = channel.get('channel_name', 'Unknown Channel')
+                channel_url = channel.get('url', 'N/A')
+                logo = channel.get('logo')
+                parts.append(f"  {i}. {channel_name}\n")
+                parts.append(f"     URL: {channel_url}\n")
+                if logo:
+                    parts.append(f"     Logo: {logo}\n")
+            parts.append("\n" + "="*80 + "\n\n")
+    
+    # Write individual streams if any
+    if data.get('streams'):
+        parts.append("=== INDIVIDUAL STREAMS ===\n\n")
+        parts.extend(
+            f"{i}. {stream.get('url', 'N/A')}\n"
+            f"   Bandwidth: {stream.get('bandwidth', 'N/A')}\n"
+            f"   Resolution: {stream.get('resolution', 'N/A')}\n\n"
+            for i, stream in enumerate(data['streams'], 1)
+        )
+    
+    # Write segments (first 10) if any
+    if data.get('segments'):
+        parts.append("=== MEDIA SEGMENTS (First 10) ===\n\n")
+        parts.extend(
+            f"{i}. {segment.get('url', 'N/A')}\n"
+            for i, segment in enumerate(data['segments'][:10], 1)
+        )
+    
     with open(urls_file, 'w') as f:
-        f.write(f"Extracted at: {data.get('timestamp', 'Unknown')}\n")
-        f.write(f"Base URL: {data.get('base_url', 'Unknown')}\n\n")
-        
-        # Write grouped events
-        if data.get('grouped_events'):
-            f.write("=== GROUPED EVENTS BY TITLE ===\n\n")
-            for event_title, event_data in data['grouped_events'].items():
-                f.write(f"EVENT: {event_title}\n")
-                f.write(f"Time: {event_data.get('event_time', 'N/A')}\n")
-                f.write(f"Date: {event_data.get('event_date', 'N/A')}\n")
-                f.write(f"Category: {event_data.get('category', 'N/A')}\n")
-                f.write(f"Available Channels ({len(event_data.get('channels', []))}):\n")
-                
-                for i, channel in enumerate(event_data.get('channels', []), 1):
-                    f.write(f"  {i}. {channel.get('channel_name', 'Unknown Channel')}\n")
-                    f.write(f"     URL: {channel.get('url', 'N/A')}\n")
-                    if channel.get('logo'):
-                        f.write(f"     Logo: {channel.get('logo')}\n")
-                f.write("\n" + "="*80 + "\n\n")
-        
-        # Write individual streams if any
-        if data.get('streams'):
-            f.write("=== INDIVIDUAL STREAMS ===\n\n")
-            for i, stream in enumerate(data['streams']):
-                f.write(f"{i+1}. {stream.get('url', 'N/A')}\n")
-                f.write(f"   Bandwidth: {stream.get('bandwidth', 'N/A')}\n")
-                f.write(f"   Resolution: {stream.get('resolution', 'N/A')}\n\n")
-        
-        # Write segments (first 10) if any
-        if data.get('segments'):
-            f.write("=== MEDIA SEGMENTS (First 10) ===\n\n")
-            for i, segment in enumerate(data['segments'][:10]):
-                f.write(f"{i+1}. {segment.get('url', 'N/A')}\n")
+        f.writelines(parts)
     
     # Save a summary file with fixed filename
     summary_file = os.path.join(output_dir, 'rbtv_summary.txt')
+    parts = [
+        "M3U8 EXTRACTION SUMMARY\n",
+        "=" * 50 + "\n\n",
+        f"Extraction Time: {data.get('timestamp', 'Unknown')}\n",
+        f"Source URL: {data.get('base_url', 'Unknown')}\n\n"
+    ]
+    
+    # Statistics
+    grouped_events = data.get('grouped_events', {})
+    total_channels = sum(len(event['channels']) for event in grouped_events.values())
+    
+    parts.append("STATISTICS:\n")
+    parts.append(f"- Unique Events: {len(grouped_events)}\n")
+    parts.append(f"- Total Channels: {total_channels}\n")
+    parts.append(f"- Individual Streams: {len(data.get('streams', []))}\n")
+    parts.append(f"- Media Segments: {len(data.get('segments', []))}\n")
+    parts.append(f"- Other Events: {len(data.get('events', [])) - total_channels}\n\n")
+    
+    # Event breakdown
+    if grouped_events:
+        parts.append("EVENT BREAKDOWN:\n")
+        for event_title, event_data in grouped_events.items():
+            channel_count = len(event_data.get('channels', []))
+            parts.append(f"- {event_title[:60]}{'...' if len(event_title) > 60 else ''}\n")
+            parts.append(f"  Time: {event_data.get('event_time', 'N/A')}, Channels: {channel_count}\n")
+    
     with open(summary_file, 'w') as f:
-        f.write("M3U8 EXTRACTION SUMMARY\n")
-        f.write("=" * 50 + "\n\n")
-        f.write(f"Extraction Time: {data.get('timestamp', 'Unknown')}\n")
-        f.write(f"Source URL: {data.get('base_url', 'Unknown')}\n\n")
-        
-        # Statistics
-        grouped_events = data.get('grouped_events', {})
-        total_channels = sum(len(event['channels']) for event in grouped_events.values())
-        
-        f.write("STATISTICS:\n")
-        f.write(f"- Unique Events: {len(grouped_events)}\n")
-        f.write(f"- Total Channels: {total_channels}\n")
-        f.write(f"- Individual Streams: {len(data.get('streams', []))}\n")
-        f.write(f"- Media Segments: {len(data.get('segments', []))}\n")
-        f.write(f"- Other Events: {len(data.get('events', [])) - total_channels}\n\n")
-        
-        # Event breakdown
-        if grouped_events:
-            f.write("EVENT BREAKDOWN:\n")
-            for event_title, event_data in grouped_events.items():
-                channel_count = len(event_data.get('channels', []))
-                f.write(f"- {event_title[:60]}{'...' if len(event_title) > 60 else ''}\n")
-                f.write(f"  Time: {event_data.get('event_time', 'N/A')}, Channels: {channel_count}\n")
+        f.write(''.join(parts))
     
     print(f"Results saved to {output_dir}/ (files updated)")
     return json_file, urls_file, summary_file
 
 def main():
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     url = "https://world-proxifier.xyz/rbtv/playlist.m3u8?timezone=pht"
+    now = datetime.datetime.now()
     
-    extractor = M3U8Extractor(url)
+    extractor = M3U8Extractor(url, now=now)
     results = extractor.extract_all(url)
     
     if 'error' in results: